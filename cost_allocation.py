@@ -0,0 +1,229 @@
+import csv
+import json
+import os
+import sys
+import time
+import numpy as np
+import efficiency
+import fast_decoder
+
+# Мітки подів, по яких рахуємо витрати
+LABEL_KEYS = ('team', 'app')
+
+
+class _Codes:
+    """Перетворює рядкові ключі в цілі коди для bincount."""
+
+    def __init__(self):
+        self.index = {}
+        self.names = []
+
+    def code(self, name):
+        code = self.index.get(name)
+        if code is None:
+            code = self.index[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class PodTable:
+    """Колонкова таблиця подів, що живе між тіками.
+
+    Коди ключів і requests кешуються для кожного пода; на тіку заново рахуються лише
+    поди, що з'явились або змінились, а також usage з metrics.k8s.io.
+    """
+
+    def __init__(self, label_keys=LABEL_KEYS):
+        self.label_keys = label_keys
+        self._reset()
+
+    def _reset(self):
+        self.nodes, self.namespaces, self.owners = _Codes(), _Codes(), _Codes()
+        self.labels = {key: _Codes() for key in self.label_keys}
+        self.cache = {}  # (namespace, pod) -> (pod, коди, cpu request, memory request, ключі метрик)
+
+    def _static_row(self, pod):
+        codes = (self.nodes.code(pod.node_name), self.namespaces.code(pod.namespace),
+                 self.owners.code(f"{pod.namespace}/{efficiency.workload_owner(pod)}"))
+        codes += tuple(self.labels[key].code(pod.labels.get(key, '<none>')) for key in self.label_keys)
+        cpu_request = memory_request = 0
+        for container in pod.containers:
+            cpu_request += container.cpu_request
+            memory_request += container.memory_request
+        usage_keys = tuple((pod.namespace, pod.name, container.name) for container in pod.containers)
+        return pod, codes, cpu_request, memory_request, usage_keys
+
+    def build(self, pods, pod_usage):
+        """Коди ключів і numpy-масиви max(request, usage) (vCPUs, GiB) для поточного тіку."""
+        # Коди зниклих подів лише накопичуються; коли їх стає забагато — перебудовуємо з нуля
+        if len(self.owners.names) > 2 * len(self.cache) + 1024:
+            self._reset()
+
+        cache = {}
+        code_rows, cpu_request, memory_request, cpu_used, memory_used = [], [], [], [], []
+        for pod in pods:
+            if not pod.node_name or pod.phase in fast_decoder.TERMINAL_PHASES:
+                continue
+            key = (pod.namespace, pod.name)
+            row = self.cache.get(key)
+            if row is None or row[0] != pod:
+                row = self._static_row(pod)
+            cache[key] = row
+
+            pod_cpu_used = pod_memory_used = 0
+            for usage_key in row[4]:
+                usage = pod_usage.get(usage_key)
+                if usage is not None:
+                    pod_cpu_used += usage[0]
+                    pod_memory_used += usage[1]
+            code_rows.append(row[1])
+            cpu_request.append(row[2])
+            memory_request.append(row[3])
+            cpu_used.append(pod_cpu_used)
+            memory_used.append(pod_memory_used)
+        self.cache = cache
+
+        codes = np.array(code_rows, dtype=np.int64).reshape(len(code_rows), 3 + len(self.label_keys))
+        groups = {'namespace': (self.namespaces.names, codes[:, 1]),
+                  'owner': (self.owners.names, codes[:, 2])}
+        for i, key in enumerate(self.label_keys):
+            groups[f"label:{key}"] = (self.labels[key].names, codes[:, 3 + i])
+
+        return {
+            'node_names': self.nodes.names,
+            'node_codes': codes[:, 0],
+            'cpu': np.maximum(np.array(cpu_request, dtype=np.float64), np.array(cpu_used, dtype=np.float64)),
+            'memory': np.maximum(np.array(memory_request, dtype=np.float64), np.array(memory_used, dtype=np.float64)),
+            'groups': groups,
+        }
+
+
+def build_pod_table(pods, pod_usage, label_keys=LABEL_KEYS):
+    """Одноразова побудова таблиці без кешу між тіками."""
+    return PodTable(label_keys).build(pods, pod_usage)
+
+
+def allocate(table, node_prices, cpu_weight=0.5):
+    """Ділить ціну кожної ноди ($/год) між її подами пропорційно max(request, usage).
+
+    Частка пода = cpu_weight * частка CPU + (1 - cpu_weight) * частка пам'яті.
+    Повертає (вартість кожного пода $/год, вартість нод без подів $/год).
+    """
+    node_codes = table['node_codes']
+    node_count = len(table['node_names'])
+    prices = np.array([node_prices.get(name, 0.0) for name in table['node_names']], dtype=np.float64)
+
+    node_cpu = np.bincount(node_codes, weights=table['cpu'], minlength=node_count)
+    node_memory = np.bincount(node_codes, weights=table['memory'], minlength=node_count)
+    node_pods = np.bincount(node_codes, minlength=node_count)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cpu_share = np.where(node_cpu[node_codes] > 0, table['cpu'] / node_cpu[node_codes], 0.0)
+        memory_share = np.where(node_memory[node_codes] > 0, table['memory'] / node_memory[node_codes], 0.0)
+
+    # Якщо на ноді немає requests/usage по одному з ресурсів, вся вага йде на інший;
+    # якщо немає по обох — ділимо порівну між подами
+    has_cpu = node_cpu[node_codes] > 0
+    has_memory = node_memory[node_codes] > 0
+    weight = np.where(has_cpu & ~has_memory, 1.0, np.where(~has_cpu & has_memory, 0.0, cpu_weight))
+    share = weight * cpu_share + (1 - weight) * memory_share
+    share = np.where(has_cpu | has_memory, share, 1.0 / node_pods[node_codes])
+
+    pod_costs = share * prices[node_codes]
+    # Коди нод без подів на цьому тіку лишаються в таблиці, тому рахуємо лише ноди з подами
+    allocated_nodes = {name for name, count in zip(table['node_names'], node_pods.tolist()) if count}
+    unallocated = sum(price for name, price in node_prices.items() if name not in allocated_nodes)
+    return pod_costs, unallocated
+
+
+def rollup(table, pod_costs):
+    """Сумує вартість подів по неймспейсах, мітках і власниках: {dimension: {key: $/год}}."""
+    result = {}
+    for dimension, (names, codes) in table['groups'].items():
+        totals = np.bincount(codes, weights=pod_costs, minlength=len(names))
+        counts = np.bincount(codes, minlength=len(names))
+        result[dimension] = {name: total for name, total, count in zip(names, totals.tolist(), counts.tolist()) if count}
+    return result
+
+
+class CostLedger:
+    """Накопичена вартість ($) по кожному виміру за весь час спостереження."""
+
+    def __init__(self):
+        self.totals = {}  # dimension -> {key: USD}
+        self.hours = 0.0
+        self.last_tick = None
+
+    def add(self, rollups, unallocated, now=None):
+        """Додає поточну вартість ($/год), помножену на час від попереднього тіку."""
+        now = time.time() if now is None else now
+        if self.last_tick is not None:
+            hours = (now - self.last_tick) / 3600
+            self.hours += hours
+            for dimension, costs in rollups.items():
+                dimension_totals = self.totals.setdefault(dimension, {})
+                for key, cost in costs.items():
+                    dimension_totals[key] = dimension_totals.get(key, 0.0) + cost * hours
+            unallocated_totals = self.totals.setdefault('unallocated', {})
+            unallocated_totals['<idle nodes>'] = unallocated_totals.get('<idle nodes>', 0.0) + unallocated * hours
+        self.last_tick = now
+
+    def save(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'totals': self.totals, 'hours': self.hours}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        ledger = cls()
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            ledger.totals = data['totals']
+            ledger.hours = data['hours']
+        return ledger
+
+
+def export_csv(ledger, rollups, path):
+    """Експортує поточну ($/год) і накопичену ($) вартість по всіх вимірах."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['dimension', 'key', 'usd_per_hour', 'usd_total'])
+        for dimension in sorted(set(ledger.totals) | set(rollups)):
+            current = rollups.get(dimension, {})
+            accumulated = ledger.totals.get(dimension, {})
+            for key in sorted(set(current) | set(accumulated)):
+                writer.writerow([dimension, key, f"{current.get(key, 0.0):.6f}", f"{accumulated.get(key, 0.0):.6f}"])
+
+
+def benchmark(pod_count=100_000, node_count=2_000):
+    """Повний шлях тіку: build → allocate → rollup; декодування JSON міряє fast_decoder.py."""
+    node_data, pod_data = fast_decoder.synthetic_lists(node_count, pod_count // node_count)
+    nodes = fast_decoder.decode_node_list(node_data)
+    pods = fast_decoder.decode_pod_list(pod_data)
+    node_prices = {node.name: 0.1 for node in nodes}
+    rng = np.random.default_rng(0)
+    table = PodTable()
+
+    print(f"Pods: {len(pods)}, Nodes: {len(nodes)}")
+    for tick in ('cold', 'warm'):
+        # Usage змінюється на кожному тіку, специфікації подів — ні
+        pod_usage = {(pod.namespace, pod.name, container.name): (rng.uniform(0, 0.2), rng.uniform(0, 0.5))
+                     for pod in pods for container in pod.containers}
+
+        start = time.perf_counter()
+        pod_table = table.build(pods, pod_usage)
+        built = time.perf_counter()
+        pod_costs, unallocated = allocate(pod_table, node_prices)
+        rollups = rollup(pod_table, pod_costs)
+        elapsed = time.perf_counter() - start
+
+        print(f"{tick.capitalize()} tick: {elapsed * 1000:.1f} ms (build {(built - start) * 1000:.1f} ms, "
+              f"allocate + rollup {(elapsed - built + start) * 1000:.1f} ms), "
+              f"allocated ${sum(rollups['namespace'].values()) + unallocated:.4f}/hour of ${sum(node_prices.values()):.4f}/hour")
+
+
+if __name__ == "__main__":
+    # python cost_allocation.py [pods] [nodes]
+    benchmark(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,192 @@
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import node_table
+
+KEEPALIVE_SECONDS = 15
+# Скільки непрочитаних тіків може накопичити глядач, перш ніж його від'єднаємо
+MAX_PENDING_FRAMES = 8
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>EKS nodes utilization</title>
+<style>
+body { font-family: monospace; background: #111; color: #ddd; margin: 20px; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border-bottom: 1px solid #333; padding: 4px 8px; text-align: left; white-space: nowrap; }
+th { color: #fff; }
+.bar { display: inline-block; width: 120px; height: 10px; background: #333; margin-right: 6px; }
+.bar span { display: block; height: 100%; }
+#status { color: #888; }
+</style>
+</head>
+<body>
+<h2>EKS nodes utilization <span id="status">connecting...</span></h2>
+<table><thead id="head"></thead><tbody id="rows"></tbody></table>
+<pre id="summary"></pre>
+<script>
+const rows = new Map();
+let order = [];
+
+function color(value) {
+  return value < 30 ? '#d33' : value < 80 ? '#cc3' : '#3c3';
+}
+
+function escape(text) {
+  return text.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+}
+
+function cell(text, index) {
+  text = escape(text);
+  if (index < 6) return '<td>' + text + '</td>';
+  const value = parseFloat(text);
+  const width = Math.max(0, Math.min(100, value));
+  return '<td><span class="bar"><span style="width:' + width + '%;background:' + color(value) + '"></span></span>' + text + '</td>';
+}
+
+function render(summary) {
+  document.getElementById('rows').innerHTML = order.map(name => '<tr>' + rows.get(name).map(cell).join('') + '</tr>').join('');
+  if (summary) document.getElementById('summary').textContent = summary.join('\\n');
+}
+
+const source = new EventSource('events');
+source.addEventListener('full', event => {
+  const frame = JSON.parse(event.data);
+  document.getElementById('head').innerHTML = '<tr>' + frame.columns.map(c => '<th>' + escape(c) + '</th>').join('') + '</tr>';
+  rows.clear();
+  frame.rows.forEach(row => rows.set(row[0], row));
+  order = frame.rows.map(row => row[0]);
+  render(frame.summary);
+});
+source.addEventListener('delta', event => {
+  const frame = JSON.parse(event.data);
+  frame.upsert.forEach(row => rows.set(row[0], row));
+  frame.remove.forEach(name => rows.delete(name));
+  if (frame.order) order = frame.order;
+  render(frame.summary);
+});
+source.onopen = () => document.getElementById('status').textContent = '';
+source.onerror = () => document.getElementById('status').textContent = 'reconnecting...';
+</script>
+</body>
+</html>
+""".encode()
+
+
+def encode_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode()
+
+
+class Dashboard:
+    """Розсилає глядачам дельти таблиці нод; кожен тік кодується один раз для всіх."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = {}  # node -> комірки рядка
+        self.order = []
+        self.summary = []
+        self.full_frame = encode_event('full', {'columns': node_table.COLUMNS, 'rows': [], 'summary': []})
+        self.subscribers = set()
+
+    def publish(self, node_data):
+        """Викликається з циклу збору даних на кожному тіку."""
+        rows = {}
+        for data in node_data:
+            row = node_table.format_node_row(data)
+            rows[row[0]] = row
+        order = list(rows)
+        summary = node_table.summary_lines(node_data)
+
+        delta = {
+            'upsert': [row for name, row in rows.items() if self.rows.get(name) != row],
+            'remove': [name for name in self.rows if name not in rows],
+        }
+        if order != self.order:
+            delta['order'] = order
+        if summary != self.summary:
+            delta['summary'] = summary
+
+        with self.lock:
+            self.rows, self.order, self.summary = rows, order, summary
+            self.full_frame = encode_event('full', {
+                'columns': node_table.COLUMNS,
+                'rows': [rows[name] for name in order],
+                'summary': summary,
+            })
+            if len(delta) == 2 and not delta['upsert'] and not delta['remove']:
+                return
+            frame = encode_event('delta', delta)
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.put_nowait(frame)
+                except queue.Full:
+                    # Повільний глядач: від'єднуємо, браузер перепідключиться і отримає повний кадр
+                    self.subscribers.discard(subscriber)
+
+    def subscribe(self):
+        subscriber = queue.Queue(MAX_PENDING_FRAMES)
+        with self.lock:
+            subscriber.put_nowait(self.full_frame)
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def is_subscribed(self, subscriber):
+        with self.lock:
+            return subscriber in self.subscribers
+
+
+class _Handler(BaseHTTPRequestHandler):
+    dashboard = None
+
+    def do_GET(self):
+        if self.path in ('/', '/index.html'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+        elif self.path == '/events':
+            self.stream_events()
+        else:
+            self.send_error(404)
+
+    def stream_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        subscriber = self.dashboard.subscribe()
+        try:
+            while True:
+                try:
+                    frame = subscriber.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    if not self.dashboard.is_subscribed(subscriber):
+                        break
+                    frame = b": keepalive\n\n"
+                self.wfile.write(frame)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.dashboard.unsubscribe(subscriber)
+
+    def log_message(self, format, *args):
+        # Не засмічуємо таблицю в терміналі логами запитів
+        pass
+
+
+def serve(dashboard, port, host='127.0.0.1'):
+    """Запускає HTTP-сервер дашборду у фоновому потоці."""
+    handler = type('DashboardHandler', (_Handler,), {'dashboard': dashboard})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
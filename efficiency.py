@@ -0,0 +1,60 @@
+import fast_decoder
+
+# Порядок колонок у зведенні
+COLUMNS = ('cpu_requested', 'cpu_used', 'cpu_idle', 'memory_requested', 'memory_used', 'memory_idle')
+
+
+def workload_owner(pod):
+    """Власник пода як Kind/name; ReplicaSet з pod-template-hash зводиться до Deployment."""
+    if pod.owner_kind is None:
+        return f"Pod/{pod.name}"
+    if pod.owner_kind == 'ReplicaSet':
+        pod_template_hash = pod.labels.get('pod-template-hash')
+        if pod_template_hash and pod.owner_name.endswith('-' + pod_template_hash):
+            return f"Deployment/{pod.owner_name[:-len(pod_template_hash) - 1]}"
+    return f"{pod.owner_kind}/{pod.owner_name}"
+
+
+def join_usage(pods, pod_usage):
+    """Hash join специфікацій подів з метриками по (namespace, pod, container) за один прохід.
+
+    pod_usage — хеш-таблиця з fast_decoder.list_pod_metrics. Повертає кортежі
+    (pod, container, cpu_used, memory_used); контейнери без метрик мають used = 0.
+    Незаплановані та завершені поди не резервують ресурсів нод, тому пропускаються.
+    """
+    for pod in pods:
+        if not pod.node_name or pod.phase in fast_decoder.TERMINAL_PHASES:
+            continue
+        for container in pod.containers:
+            cpu_used, memory_used = pod_usage.get((pod.namespace, pod.name, container.name), (0, 0))
+            yield pod, container, cpu_used, memory_used
+
+
+def summarize(pods, pod_usage):
+    """Requested / used / idle-but-reserved по нодах, неймспейсах і власниках."""
+    by_node = {}
+    by_namespace = {}
+    by_owner = {}
+    for pod, container, cpu_used, memory_used in join_usage(pods, pod_usage):
+        values = (
+            container.cpu_request,
+            cpu_used,
+            max(container.cpu_request - cpu_used, 0),
+            container.memory_request,
+            memory_used,
+            max(container.memory_request - memory_used, 0),
+        )
+        for totals, key in ((by_node, pod.node_name),
+                            (by_namespace, pod.namespace),
+                            (by_owner, (pod.namespace, workload_owner(pod)))):
+            row = totals.get(key)
+            if row is None:
+                totals[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    row[i] += value
+    return by_node, by_namespace, by_owner
+
+
+def collect(v1, metrics_api):
+    return summarize(fast_decoder.list_pods(v1), fast_decoder.list_pod_metrics(metrics_api))
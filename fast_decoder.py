@@ -0,0 +1,325 @@
+import sys
+import json
+import inspect
+import time
+from collections import namedtuple
+from fractions import Fraction
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+# orjson значно швидший за стандартний json, але не обов'язковий
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Компактні записи лише з тими полями, які реально читають скрипти
+NodeRecord = namedtuple('NodeRecord', [
+    'name', 'instance_id', 'internal_ip', 'labels',
+    'cpu_allocatable', 'memory_allocatable', 'cpu_capacity', 'memory_capacity',
+])
+PodRecord = namedtuple('PodRecord', [
+    'namespace', 'name', 'node_name', 'phase', 'labels', 'owner_kind', 'owner_name', 'containers',
+])
+ContainerRecord = namedtuple('ContainerRecord', ['name', 'cpu_request', 'memory_request'])
+
+# Завершені поди (наприклад, Job/CronJob до прибирання) нічого не резервують і не споживають
+TERMINAL_PHASES = ('Succeeded', 'Failed')
+
+
+def parse_cpu(cpu_str):
+    """Конвертує рядок CPU у vCPUs (так само, як у get_node_utilization)."""
+    return int(cpu_str.replace('m', '')) / 1000 if 'm' in cpu_str else int(cpu_str)
+
+
+def parse_node_memory(memory_str):
+    """Конвертує пам'ять ноди (в Ki) у GiB."""
+    return int(memory_str.replace('Ki', '')) / (1024 * 1024)
+
+
+# Суфікси кількостей Kubernetes: множник (чисельник, знаменник)
+_BINARY_SUFFIXES = {'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30, 'Ti': 2 ** 40, 'Pi': 2 ** 50, 'Ei': 2 ** 60}
+_DECIMAL_SUFFIXES = {'n': (1, 10 ** 9), 'u': (1, 10 ** 6), 'm': (1, 10 ** 3), 'k': (10 ** 3, 1), 'M': (10 ** 6, 1),
+                     'G': (10 ** 9, 1), 'T': (10 ** 12, 1), 'P': (10 ** 15, 1), 'E': (10 ** 18, 1)}
+GIB = 2 ** 30
+
+
+def parse_quantity(quantity, unit=1):
+    """Конвертує кількість Kubernetes (100m, 0.5, 512M, 1Gi, 1e3, 128974848) у float в одиницях unit."""
+    number, numerator, denominator = quantity, 1, 1
+    if quantity[-2:] in _BINARY_SUFFIXES:
+        number, numerator = quantity[:-2], _BINARY_SUFFIXES[quantity[-2:]]
+    elif quantity[-1:] in _DECIMAL_SUFFIXES:
+        number = quantity[:-1]
+        numerator, denominator = _DECIMAL_SUFFIXES[quantity[-1:]]
+    if number.isdigit():
+        # Цілі числа ділимо точно, без проміжного округлення
+        return int(number) * numerator / (denominator * unit)
+    return float(Fraction(number) * numerator / (denominator * unit))
+
+
+def parse_usage_cpu(cpu_str):
+    """Конвертує CPU з metrics.k8s.io у vCPUs."""
+    return parse_quantity(cpu_str)
+
+
+def parse_usage_memory(memory_str):
+    """Конвертує пам'ять з metrics.k8s.io у GiB."""
+    return parse_quantity(memory_str, GIB)
+
+
+def decode_node(item):
+    metadata = item['metadata']
+    status = item['status']
+    internal_ip = None
+    for addr in status.get('addresses') or ():
+        if addr['type'] == 'InternalIP':
+            internal_ip = addr['address']
+            break
+    allocatable = status['allocatable']
+    capacity = status['capacity']
+    return NodeRecord(
+        metadata['name'],
+        (metadata.get('annotations') or {}).get('node.kubernetes.io/instance-id'),
+        internal_ip,
+        metadata.get('labels') or {},
+        parse_cpu(allocatable['cpu']),
+        parse_node_memory(allocatable['memory']),
+        parse_cpu(capacity['cpu']),
+        parse_node_memory(capacity['memory']),
+    )
+
+
+def decode_pod(item):
+    metadata = item['metadata']
+    spec = item['spec']
+    owner_kind = owner_name = None
+    for owner in metadata.get('ownerReferences') or ():
+        if owner.get('controller'):
+            owner_kind, owner_name = owner['kind'], owner['name']
+            break
+
+    containers = []
+    for container in spec.get('containers') or ():
+        requests = (container.get('resources') or {}).get('requests') or {}
+        cpu_request = parse_quantity(requests['cpu']) if 'cpu' in requests else 0
+        memory_request = parse_quantity(requests['memory'], GIB) if 'memory' in requests else 0
+        containers.append(ContainerRecord(container['name'], cpu_request, memory_request))
+
+    return PodRecord(
+        metadata['namespace'],
+        metadata['name'],
+        spec.get('nodeName'),
+        (item.get('status') or {}).get('phase'),
+        metadata.get('labels') or {},
+        owner_kind,
+        owner_name,
+        tuple(containers),
+    )
+
+
+def decode_node_list(data):
+    return [decode_node(item) for item in _loads(data)['items']]
+
+
+def decode_pod_list(data):
+    return [decode_pod(item) for item in _loads(data)['items']]
+
+
+def list_nodes(v1):
+    """Отримуємо ноди сирим JSON без побудови моделей V1Node."""
+    response = v1.list_node(_preload_content=False)
+    return decode_node_list(response.data)
+
+
+def list_pods(v1, field_selector=''):
+    """Отримуємо поди всіх неймспейсів одним запитом без побудови моделей V1Pod."""
+    response = v1.list_pod_for_all_namespaces(field_selector=field_selector, _preload_content=False)
+    return decode_pod_list(response.data)
+
+
+def list_node_metrics(metrics_api):
+    """Реальне споживання (vCPUs, GiB) по нодах з metrics.k8s.io; порожньо, якщо metrics-server недоступний."""
+    try:
+        response = metrics_api.list_cluster_custom_object(
+            group="metrics.k8s.io",
+            version="v1beta1",
+            plural="nodes",
+            _preload_content=False
+        )
+    except ApiException as e:
+        print(f"Error fetching node metrics: {e}")
+        return {}
+    return {item['metadata']['name']: (parse_usage_cpu(item['usage']['cpu']), parse_usage_memory(item['usage']['memory']))
+            for item in _loads(response.data)['items']}
+
+
+def list_pod_metrics(metrics_api):
+    """Реальне споживання контейнерів: {(namespace, pod, container): (vCPUs, GiB)}."""
+    try:
+        response = metrics_api.list_cluster_custom_object(
+            group="metrics.k8s.io",
+            version="v1beta1",
+            plural="pods",
+            _preload_content=False
+        )
+    except ApiException as e:
+        print(f"Error fetching pod metrics: {e}")
+        return {}
+    usage = {}
+    for item in _loads(response.data)['items']:
+        metadata = item['metadata']
+        for container in item['containers']:
+            usage[(metadata['namespace'], metadata['name'], container['name'])] = (
+                parse_usage_cpu(container['usage']['cpu']), parse_usage_memory(container['usage']['memory']))
+    return usage
+
+
+def group_pods_by_node(pods):
+    pods_by_node = {}
+    for pod in pods:
+        if pod.node_name:
+            pods_by_node.setdefault(pod.node_name, []).append(pod)
+    return pods_by_node
+
+
+def node_utilization(node, pods):
+    """Те саме, що get_node_utilization у vizualizer-usage.py, але над записами."""
+    used_cpu = 0
+    used_memory = 0
+    # Сумуємо в тому ж порядку, що й повільний шлях, щоб результати збігались побітово
+    for pod in pods:
+        for container in pod.containers:
+            used_cpu += container.cpu_request
+    for pod in pods:
+        for container in pod.containers:
+            used_memory += container.memory_request
+
+    cpu_utilization = (used_cpu / node.cpu_capacity) * 100 if node.cpu_capacity > 0 else 0
+    memory_utilization = (used_memory / node.memory_capacity) * 100 if node.memory_capacity > 0 else 0
+
+    return (cpu_utilization, memory_utilization, node.cpu_capacity, node.memory_capacity,
+            node.cpu_allocatable, node.memory_allocatable, used_cpu, used_memory)
+
+
+# --- Бенчмарк: моделі kubernetes client проти швидкого декодера ---
+
+def model_node_utilization(node, pods):
+    """Поточний шлях: обчислення над моделями V1Node/V1Pod."""
+    cpu_capacity = parse_cpu(node.status.capacity['cpu'])
+    memory_capacity = parse_node_memory(node.status.capacity['memory'])
+    cpu_allocatable = parse_cpu(node.status.allocatable['cpu'])
+    memory_allocatable = parse_node_memory(node.status.allocatable['memory'])
+
+    used_cpu = 0
+    for pod in pods:
+        if pod.spec.containers:
+            for container in pod.spec.containers:
+                resources = container.resources
+                if resources.requests and 'cpu' in resources.requests:
+                    used_cpu += parse_quantity(resources.requests['cpu'])
+    used_memory = 0
+    for pod in pods:
+        if pod.spec.containers:
+            for container in pod.spec.containers:
+                resources = container.resources
+                if resources.requests and 'memory' in resources.requests:
+                    used_memory += parse_quantity(resources.requests['memory'], GIB)
+
+    cpu_utilization = (used_cpu / cpu_capacity) * 100 if cpu_capacity > 0 else 0
+    memory_utilization = (used_memory / memory_capacity) * 100 if memory_capacity > 0 else 0
+
+    return (cpu_utilization, memory_utilization, cpu_capacity, memory_capacity,
+            cpu_allocatable, memory_allocatable, used_cpu, used_memory)
+
+
+class _RawResponse:
+    # Мінімальна обгортка, яку приймає ApiClient.deserialize у старих версіях клієнта
+    def __init__(self, data):
+        self.data = data
+
+
+def model_deserialize(api_client, data, response_type):
+    """Десеріалізує сирий JSON у моделі для будь-якої версії kubernetes client."""
+    # Новіші версії клієнта (напр. 37.x) приймають у deserialize (response_text, response_type, content_type)
+    if 'content_type' in inspect.signature(api_client.deserialize).parameters:
+        return api_client.deserialize(data.decode(), response_type, 'application/json')
+    return api_client.deserialize(_RawResponse(data), response_type)
+
+
+def synthetic_lists(node_count, pods_per_node):
+    nodes = []
+    pods = []
+    for n in range(node_count):
+        node_name = f"ip-10-0-{n // 256}-{n % 256}.eu-west-1.compute.internal"
+        nodes.append({
+            'metadata': {
+                'name': node_name,
+                'labels': {'node.kubernetes.io/instance-type': 'c5a.large',
+                           'topology.kubernetes.io/zone': 'eu-west-1a'},
+                'annotations': {'node.kubernetes.io/instance-id': f"i-{n:017x}"},
+            },
+            'status': {
+                'addresses': [{'type': 'InternalIP', 'address': f"10.0.{n // 256}.{n % 256}"}],
+                'allocatable': {'cpu': '1930m', 'memory': '3364544Ki', 'pods': '29'},
+                'capacity': {'cpu': '2', 'memory': '3959488Ki', 'pods': '29'},
+            },
+        })
+        for p in range(pods_per_node):
+            pods.append({
+                'metadata': {
+                    'name': f"app-{n}-{p}-7d9f8c6b5-x2k4q",
+                    'namespace': f"team-{p % 7}",
+                    'labels': {'app': f"app-{p}", 'pod-template-hash': '7d9f8c6b5'},
+                    'ownerReferences': [{'apiVersion': 'apps/v1', 'kind': 'ReplicaSet',
+                                         'name': f"app-{p}-7d9f8c6b5", 'uid': 'x', 'controller': True}],
+                },
+                'spec': {
+                    'nodeName': node_name,
+                    'containers': [
+                        {'name': 'app', 'image': 'nginx:1.27',
+                         'resources': {'requests': {'cpu': f"{50 + p}m", 'memory': f"{64 + p}Mi"},
+                                       'limits': {'cpu': '1', 'memory': '1Gi'}}},
+                        {'name': 'sidecar', 'image': 'envoy:1.31',
+                         'resources': {'requests': {'cpu': '0.01', 'memory': '32M'}}},
+                    ],
+                },
+                'status': {'phase': 'Running', 'podIP': '10.0.0.1'},
+            })
+    node_list = json.dumps({'kind': 'NodeList', 'apiVersion': 'v1', 'metadata': {}, 'items': nodes}).encode()
+    pod_list = json.dumps({'kind': 'PodList', 'apiVersion': 'v1', 'metadata': {}, 'items': pods}).encode()
+    return node_list, pod_list
+
+
+def benchmark(node_count=200, pods_per_node=25):
+    api_client = client.ApiClient()
+    node_data, pod_data = synthetic_lists(node_count, pods_per_node)
+
+    start = time.perf_counter()
+    model_nodes = model_deserialize(api_client, node_data, 'V1NodeList').items
+    model_pods = model_deserialize(api_client, pod_data, 'V1PodList').items
+    model_pods_by_node = {}
+    for pod in model_pods:
+        model_pods_by_node.setdefault(pod.spec.node_name, []).append(pod)
+    model_results = [model_node_utilization(node, model_pods_by_node.get(node.metadata.name, []))
+                     for node in model_nodes]
+    model_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    nodes = decode_node_list(node_data)
+    pods_by_node = group_pods_by_node(decode_pod_list(pod_data))
+    fast_results = [node_utilization(node, pods_by_node.get(node.name, ())) for node in nodes]
+    fast_time = time.perf_counter() - start
+
+    if model_results != fast_results:
+        raise AssertionError("Fast path results differ from kubernetes client models")
+
+    print(f"Nodes: {node_count}, Pods: {node_count * pods_per_node}, JSON: {_loads.__module__}")
+    print(f"Models:    {model_time * 1000:.1f} ms")
+    print(f"Fast path: {fast_time * 1000:.1f} ms ({model_time / fast_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    # python fast_decoder.py [nodes] [pods_per_node]
+    benchmark(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,126 @@
+import csv
+
+# Виміри групування: мітки нод, з яких береться ім'я групи
+DIMENSIONS = {
+    'nodegroup': ('eks.amazonaws.com/nodegroup',),
+    'nodepool': ('karpenter.sh/nodepool',),
+    'zone': ('topology.kubernetes.io/zone', 'failure-domain.beta.kubernetes.io/zone'),
+    'instance_type': ('node.kubernetes.io/instance-type', 'beta.kubernetes.io/instance-type'),
+    'capacity_type': ('karpenter.sh/capacity-type', 'eks.amazonaws.com/capacityType'),
+}
+# Значення, що накопичуються по групах
+VALUES = ('nodes', 'cpu_capacity', 'memory_capacity', 'cpu_requested', 'memory_requested',
+          'cpu_used', 'memory_used', 'cost')
+
+
+def group_key(dimension, node):
+    """Ім'я групи ноди для виміру; capacity type береться з EC2, якщо відомий."""
+    if dimension == 'capacity_type' and node.get('instance_status'):
+        return node['instance_status']
+    labels = node.get('labels') or {}
+    for label in DIMENSIONS[dimension]:
+        if label in labels:
+            return labels[label]
+    return 'unknown'
+
+
+def node_values(node):
+    return (
+        1,
+        node['cpu_capacity'],
+        node['memory_capacity'],
+        node['cpu_utilization'] * node['cpu_capacity'] / 100,
+        node['memory_utilization'] * node['memory_capacity'] / 100,
+        node.get('cpu_used') or 0,
+        node.get('memory_used') or 0,
+        node['price'],
+    )
+
+
+class NodeGroups:
+    """Індекси нода -> група по кожному виміру з інкрементальним оновленням агрегатів."""
+
+    def __init__(self, dimensions=tuple(DIMENSIONS)):
+        self.dimensions = dimensions
+        self.node_keys = {}  # node -> (група по кожному виміру)
+        self.node_values = {}  # node -> значення VALUES
+        self.members = {dimension: {} for dimension in dimensions}  # dimension -> {group: set(nodes)}
+        self.totals = {dimension: {} for dimension in dimensions}  # dimension -> {group: [VALUES]}
+
+    def update(self, nodes):
+        """Оновлює індекси рядками нод (node_data); перераховує лише зачеплені групи."""
+        touched = set()
+        seen = set()
+        for node in nodes:
+            name = node['name']
+            seen.add(name)
+            keys = tuple(group_key(dimension, node) for dimension in self.dimensions)
+            values = node_values(node)
+            old_keys = self.node_keys.get(name)
+            if old_keys == keys and self.node_values.get(name) == values:
+                continue
+            self._move(name, old_keys, keys, touched)
+            self.node_keys[name] = keys
+            self.node_values[name] = values
+
+        for name in [name for name in self.node_keys if name not in seen]:
+            self._move(name, self.node_keys.pop(name), None, touched)
+            del self.node_values[name]
+
+        for dimension, group in touched:
+            self._recompute(dimension, group)
+        return touched
+
+    def _move(self, name, old_keys, keys, touched):
+        for i, dimension in enumerate(self.dimensions):
+            old_group = old_keys[i] if old_keys else None
+            group = keys[i] if keys else None
+            if old_group is not None:
+                touched.add((dimension, old_group))
+                if old_group != group:
+                    self.members[dimension][old_group].discard(name)
+            if group is not None:
+                touched.add((dimension, group))
+                self.members[dimension].setdefault(group, set()).add(name)
+
+    def _recompute(self, dimension, group):
+        members = self.members[dimension].get(group)
+        if not members:
+            self.members[dimension].pop(group, None)
+            self.totals[dimension].pop(group, None)
+            return
+        totals = [0] * len(VALUES)
+        for name in members:
+            for i, value in enumerate(self.node_values[name]):
+                totals[i] += value
+        self.totals[dimension][group] = totals
+
+    def rows(self, dimension):
+        """Рядки груп виміру з утилізацією (%), відсортовані за вартістю."""
+        rows = []
+        for group, totals in self.totals[dimension].items():
+            row = dict(zip(VALUES, totals))
+            row['group'] = group
+            for resource in ('cpu', 'memory'):
+                capacity = row[f"{resource}_capacity"]
+                row[f"{resource}_request_utilization"] = row[f"{resource}_requested"] / capacity * 100 if capacity > 0 else 0
+                row[f"{resource}_usage_utilization"] = row[f"{resource}_used"] / capacity * 100 if capacity > 0 else 0
+            rows.append(row)
+        return sorted(rows, key=lambda row: row['cost'], reverse=True)
+
+    def group_nodes(self, dimension, group):
+        return sorted(self.members[dimension].get(group, ()))
+
+
+def export_csv(groups, path):
+    columns = ['dimension', 'group', 'nodes', 'cpu_capacity', 'memory_capacity', 'cpu_requested', 'memory_requested',
+               'cpu_used', 'memory_used', 'cpu_request_utilization', 'memory_request_utilization',
+               'cpu_usage_utilization', 'memory_usage_utilization', 'cost']
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for dimension in groups.dimensions:
+            for row in groups.rows(dimension):
+                row['dimension'] = dimension
+                writer.writerow([row[column] if isinstance(row[column], (str, int)) else f"{row[column]:.4f}"
+                                 for column in columns])
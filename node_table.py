@@ -0,0 +1,34 @@
+# Спільне форматування таблиці нод для термінала та браузерного дашборду,
+# щоб обидва показували однакові значення
+
+COLUMNS = ('Node Name', 'Instance Type', 'Instance Status', 'Node Pricing', 'CPU Capacity', 'Memory Capacity',
+           'CPU Utilization', 'Memory Utilization')
+
+
+def format_node_row(data):
+    """Комірки рядка ноди у вигляді рядків (без вирівнювання та кольорів)."""
+    return (
+        data['name'],
+        data['instance_type'],
+        data['instance_status'],
+        f"${data['price']:.4f}/hour",
+        f"{data['cpu_capacity']}",
+        f"{data['memory_capacity']}",
+        f"{data['cpu_utilization']:.2f}%",
+        f"{data['memory_utilization']:.2f}%",
+    )
+
+
+def summary_lines(node_data):
+    """Підсумкові рядки під таблицею."""
+    if not node_data:
+        return ["No nodes found for utilization analysis."]
+    node_count = len(node_data)
+    return [
+        f"Average CPU Utilization for all nodes: {sum(data['cpu_utilization'] for data in node_data) / node_count:.2f}%",
+        f"Average Memory Utilization for all nodes: {sum(data['memory_utilization'] for data in node_data) / node_count:.2f}%",
+        f"Total Nodes: {node_count}",
+        f"Total CPU Capacity: {sum(data['cpu_capacity'] for data in node_data):.2f} vCPUs",
+        f"Total Memory Capacity: {sum(data['memory_capacity'] for data in node_data):.2f} GiB",
+        f"Total Cost for all nodes: ${sum(data['price'] for data in node_data):.4f}/hour",
+    ]
@@ -0,0 +1,193 @@
+import csv
+import json
+import math
+import os
+import time
+
+# Метрики, які записуються для кожної ноди на кожному тіку
+METRICS = ('cpu_usage', 'memory_usage', 'cpu_requests', 'memory_requests')
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class DDSketch:
+    """Квантильний скетч із відносною похибкою та обмеженою кількістю бінів (DDSketch)."""
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        if value <= 1e-9:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self):
+        # Зливаємо найнижчі біни, щоб пам'ять залишалась сталою
+        keys = sorted(self.bins)
+        overflow = len(keys) - self.max_bins
+        target = keys[overflow]
+        for key in keys[:overflow]:
+            self.bins[target] += self.bins.pop(key)
+
+    def merge(self, other):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return max(self.min, min(self.max, value))
+        return self.max
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'bins': [[key, count] for key, count in self.bins.items()],
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'], data['max_bins'])
+        sketch.bins = {key: count for key, count in data['bins']}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+
+def window_of(timestamp):
+    """Вікно агрегації — доба UTC."""
+    return time.strftime('%Y-%m-%d', time.gmtime(timestamp))
+
+
+class UsageStats:
+    """Скетчі утилізації по нодах і добових вікнах; групи та періоди отримуються злиттям."""
+
+    def __init__(self, retention_days=35):
+        self.retention_days = retention_days
+        self.series = {}  # node -> {(metric, window): DDSketch}
+        self.node_groups = {}  # node -> node group
+        self.current_window = None
+
+    def record(self, node, group, values, timestamp=None):
+        """Записує значення метрик ноди (у відсотках) за один тік."""
+        timestamp = time.time() if timestamp is None else timestamp
+        window = window_of(timestamp)
+        if window != self.current_window:
+            self.current_window = window
+            self.expire(timestamp)
+        self.node_groups[node] = group
+        node_series = self.series.setdefault(node, {})
+        for metric in METRICS:
+            value = values.get(metric)
+            if value is None:
+                continue
+            sketch = node_series.get((metric, window))
+            if sketch is None:
+                sketch = node_series[(metric, window)] = DDSketch()
+            sketch.add(value)
+
+    def expire(self, now=None):
+        oldest = window_of((time.time() if now is None else now) - self.retention_days * 86400)
+        for node in list(self.series):
+            node_series = self.series[node]
+            for key in [key for key in node_series if key[1] < oldest]:
+                del node_series[key]
+            if not node_series:
+                del self.series[node]
+                self.node_groups.pop(node, None)
+
+    def query(self, metric, nodes=None, group=None, since=None):
+        """Зливає скетчі вибраних нод (або групи нод) за вікна, починаючи з since (YYYY-MM-DD)."""
+        if nodes is None:
+            nodes = self.series if group is None else [node for node, node_group in self.node_groups.items()
+                                                       if node_group == group]
+        merged = DDSketch()
+        for node in nodes:
+            for (sketch_metric, window), sketch in self.series.get(node, {}).items():
+                if sketch_metric == metric and (since is None or window >= since):
+                    merged.merge(sketch)
+        return merged
+
+    def percentiles(self, metric, **selector):
+        sketch = self.query(metric, **selector)
+        return [sketch.quantile(q) for q in QUANTILES]
+
+    def groups(self):
+        return sorted(set(self.node_groups.values()))
+
+    def save(self, path):
+        data = {
+            'node_groups': self.node_groups,
+            'sketches': [[node, metric, window, sketch.to_dict()]
+                         for node, node_series in self.series.items()
+                         for (metric, window), sketch in node_series.items()],
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, retention_days=35):
+        stats = cls(retention_days)
+        if not os.path.exists(path):
+            return stats
+        with open(path) as f:
+            data = json.load(f)
+        stats.node_groups = data['node_groups']
+        for node, metric, window, sketch in data['sketches']:
+            stats.series.setdefault(node, {})[(metric, window)] = DDSketch.from_dict(sketch)
+        stats.expire()
+        return stats
+
+
+def export_csv(stats, path, since=None):
+    """Експортує p50/p95/p99 по кожній ноді та кожній групі нод."""
+    series = [('node', node, {'nodes': {node}}) for node in sorted(stats.node_groups)]
+    series += [('group', group, {'group': group}) for group in stats.groups()]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['scope', 'name', 'metric', 'samples'] + [f"p{int(q * 100)}" for q in QUANTILES])
+        for scope, name, selector in series:
+            for metric in METRICS:
+                sketch = stats.query(metric, since=since, **selector)
+                if sketch.count:
+                    writer.writerow([scope, name, metric, sketch.count] +
+                                    [f"{sketch.quantile(q):.2f}" for q in QUANTILES])
@@ -0,0 +1,41 @@
+import time
+from kubernetes import client, config
+from colorama import Fore
+import efficiency
+
+config.load_kube_config(context="arn:aws:eks:eu-west-1:294949574448:cluster/dev-1-30")
+v1 = client.CoreV1Api()
+metrics_api = client.CustomObjectsApi()
+
+def display_table(title, totals, top=20):
+    print("\n" + "-" * 150)
+    print(f"{title:<60} | {'CPU Req':>9} | {'CPU Used':>9} | {'CPU Idle':>9} | {'Mem Req GiB':>11} | {'Mem Used GiB':>12} | {'Mem Idle GiB':>12}")
+    print("-" * 150)
+    # Спочатку ті, хто найбільше резервує і не використовує
+    rows = sorted(totals.items(), key=lambda item: item[1][2], reverse=True)
+    for key, (cpu_req, cpu_used, cpu_idle, mem_req, mem_used, mem_idle) in rows[:top]:
+        name = " ".join(key) if isinstance(key, tuple) else key
+        color = Fore.RED if cpu_req > 0 and cpu_idle / cpu_req > 0.7 else Fore.RESET
+        print(f"{color}{name[:60]:<60} | {cpu_req:>9.2f} | {cpu_used:>9.2f} | {cpu_idle:>9.2f} | {mem_req:>11.2f} | {mem_used:>12.2f} | {mem_idle:>12.2f}{Fore.RESET}")
+
+def analyze_efficiency():
+    while True:
+        by_node, by_namespace, by_owner = efficiency.collect(v1, metrics_api)
+        display_table("Node", by_node)
+        display_table("Namespace", by_namespace)
+        display_table("Namespace / Workload", by_owner)
+
+        cpu_req = sum(row[0] for row in by_node.values())
+        cpu_idle = sum(row[2] for row in by_node.values())
+        mem_req = sum(row[3] for row in by_node.values())
+        mem_idle = sum(row[5] for row in by_node.values())
+        print(f"\nTotal CPU Requested: {cpu_req:.2f} vCPUs, Idle but reserved: {cpu_idle:.2f} vCPUs")
+        print(f"Total Memory Requested: {mem_req:.2f} GiB, Idle but reserved: {mem_idle:.2f} GiB")
+
+        print("\nPress Ctrl+C to quit...")
+        time.sleep(30)
+
+try:
+    analyze_efficiency()
+except KeyboardInterrupt:
+    print("\nExiting...")
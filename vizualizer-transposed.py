@@ -1,8 +1,16 @@
+import os
 import time
+import signal
 import json
 import boto3
 from kubernetes import client, config
 from colorama import Fore
+import fast_decoder
+import usage_stats
+import cost_allocation
+import node_groups
+import node_table
+import dashboard
 
 aws_region = 'eu-west-1'
 pricing_region = 'us-east-1'
@@ -11,6 +19,35 @@ ec2_client = boto3.client('ec2', region_name=aws_region)
 
 config.load_kube_config(context="arn:aws:eks:eu-west-1:294949574448:cluster/dev-1-30")
 v1 = client.CoreV1Api()
+metrics_api = client.CustomObjectsApi()
+
+# Швидкий шлях: сирий JSON замість моделей kubernetes client (VIZUALIZER_FAST_PATH=0 вимикає)
+use_fast_path = os.environ.get('VIZUALIZER_FAST_PATH', '1') != '0'
+
+# Довгострокова статистика (p50/p95/p99) зберігається між запусками
+stats_path = os.environ.get('VIZUALIZER_STATS_FILE', 'usage_stats.json')
+export_dir = os.environ.get('VIZUALIZER_EXPORT_DIR', 'exports')
+stats = usage_stats.UsageStats.load(stats_path)
+# Періодичне збереження, щоб аварійне завершення не втратило накопичене (0 — лише при виході)
+save_every = int(os.environ.get('VIZUALIZER_SAVE_EVERY', '60'))  # У тіках
+
+# Розподіл вартості нод між подами; CPU_WEIGHT — вага CPU проти пам'яті
+cost_path = os.environ.get('VIZUALIZER_COST_FILE', 'cost_ledger.json')
+cpu_weight = float(os.environ.get('VIZUALIZER_CPU_WEIGHT', '0.5'))
+cost_ledger = cost_allocation.CostLedger.load(cost_path)
+pod_table = cost_allocation.PodTable()  # Кешує коди й requests подів між тіками
+cost_rollups = {}
+
+# Згруповане представлення: VIZUALIZER_GROUP_BY — вимір, VIZUALIZER_EXPAND — розгорнуті групи (або all)
+group_by = os.environ.get('VIZUALIZER_GROUP_BY', 'nodegroup')
+expanded_groups = set(filter(None, os.environ.get('VIZUALIZER_EXPAND', '').split(',')))
+groups = node_groups.NodeGroups()
+
+# Браузерний дашборд (SSE): VIZUALIZER_DASHBOARD_PORT вмикає HTTP-сервер поруч із таблицею.
+# Без автентифікації, тому за замовчуванням слухає лише localhost (VIZUALIZER_DASHBOARD_HOST=0.0.0.0 — для всіх)
+dashboard_port = os.environ.get('VIZUALIZER_DASHBOARD_PORT')
+dashboard_host = os.environ.get('VIZUALIZER_DASHBOARD_HOST', '127.0.0.1')
+live_dashboard = dashboard.Dashboard() if dashboard_port else None
 
 def get_nodes():
     return v1.list_node().items
@@ -25,15 +62,20 @@ def get_instance_id(node):
 def get_instance_id_by_internal_ip(node):
     for addr in node.status.addresses:
         if addr.type == "InternalIP":
-            internal_ip = addr.address
-            response = ec2_client.describe_instances(
-                Filters=[{
-                    'Name': 'private-ip-address',
-                    'Values': [internal_ip]
-                }]
-            )
-            if response['Reservations']:
-                return response['Reservations'][0]['Instances'][0]['InstanceId']
+            return get_instance_id_by_ip(addr.address)
+    return None
+
+def get_instance_id_by_ip(internal_ip):
+    if internal_ip is None:
+        return None
+    response = ec2_client.describe_instances(
+        Filters=[{
+            'Name': 'private-ip-address',
+            'Values': [internal_ip]
+        }]
+    )
+    if response['Reservations']:
+        return response['Reservations'][0]['Instances'][0]['InstanceId']
     return None
 
 def get_instance_details(instance_id):
@@ -74,8 +116,7 @@ def get_pod_cpu_usage(node):
             for container in pod.spec.containers:
                 resources = container.resources
                 if resources.requests and 'cpu' in resources.requests:
-                    cpu_request = resources.requests['cpu']
-                    total_cpu_usage += int(cpu_request.replace('m', '')) / 1000 if 'm' in cpu_request else int(cpu_request)
+                    total_cpu_usage += fast_decoder.parse_quantity(resources.requests['cpu'])
 
     return total_cpu_usage  # Повертаємо в vCPUs
 
@@ -88,11 +129,7 @@ def get_pod_memory_usage(node):
             for container in pod.spec.containers:
                 resources = container.resources
                 if resources.requests and 'memory' in resources.requests:
-                    memory_request = resources.requests['memory']
-                    if memory_request.endswith('Mi'):
-                        total_memory_usage += int(memory_request[:-2]) / 1024  # В GiB
-                    elif memory_request.endswith('Gi'):
-                        total_memory_usage += int(memory_request[:-2])  # В GiB
+                    total_memory_usage += fast_decoder.parse_quantity(resources.requests['memory'], fast_decoder.GIB)  # В GiB
 
     return total_memory_usage  # Повертаємо в GiB
 
@@ -113,6 +150,25 @@ def get_node_utilization(node):
     memory_utilization = (used_memory / memory_capacity) * 100 if memory_capacity > 0 else 0
     return cpu_utilization, memory_utilization, cpu_capacity, memory_capacity
 
+def get_node_rows():
+    """Повертає рядки (ім'я ноди, мітки, instance ID, утилізація) і записи подів (None без швидкого шляху)."""
+    rows = []
+    if use_fast_path:
+        nodes = fast_decoder.list_nodes(v1)
+        pods = fast_decoder.list_pods(v1)  # Один запит замість двох на ноду
+        pods_by_node = fast_decoder.group_pods_by_node(pods)
+        for node in nodes:
+            instance_id = node.instance_id or get_instance_id_by_ip(node.internal_ip)
+            utilization = fast_decoder.node_utilization(node, pods_by_node.get(node.name, ()))[:4]
+            rows.append((node.name, node.labels, instance_id, utilization))
+        return rows, pods
+
+    for node in get_nodes():
+        instance_id = get_instance_id(node)
+        utilization = get_node_utilization(node) if instance_id else None
+        rows.append((node.metadata.name, node.metadata.labels or {}, instance_id, utilization))
+    return rows, None
+
 def display_progress_bar(value):
     bar_length = 20  # Довжина прогрес-бару
     filled_length = int(bar_length * (value / 100))
@@ -121,72 +177,147 @@ def display_progress_bar(value):
     color = Fore.RED if value < 30 else Fore.YELLOW if value < 80 else Fore.GREEN
     return f"{color}[{bar}] {value:.2f}%{Fore.RESET}"
 
+def display_grouped(node_data):
+    """Групи згорнуті в один рядок; розгорнуті показують свої ноди."""
+    nodes_by_name = {data["name"]: data for data in node_data}
+    print("\n" + "-" * 160)
+    print(f"{'Group by ' + group_by:<34} | {'Nodes':<6} | {'Cost (USD/h)':<12} | {'CPU Capacity':<12} | {'Memory Capacity':<15} | {'CPU Requests':<20} | {'Memory Requests':<20} | {'CPU Usage':<10} | {'Memory Usage':<12}")
+    print("-" * 160)
+    for row in groups.rows(group_by):
+        expanded = 'all' in expanded_groups or row['group'] in expanded_groups
+        print(f"{('[-] ' if expanded else '[+] ') + row['group']:<34} | {row['nodes']:<6} | {row['cost']:<12.4f} | {row['cpu_capacity']:<12.2f} | {row['memory_capacity']:<15.2f} | {display_progress_bar(row['cpu_request_utilization'])} | {display_progress_bar(row['memory_request_utilization'])} | {row['cpu_usage_utilization']:<9.2f}% | {row['memory_usage_utilization']:<11.2f}%")
+        if expanded:
+            for name in groups.group_nodes(group_by, row['group']):
+                data = nodes_by_name[name]
+                print(f"    {name:<30} | {'':<6} | {data['price']:<12.4f} | {data['cpu_capacity']:<12.2f} | {data['memory_capacity']:<15.2f} | {display_progress_bar(data['cpu_utilization'])} | {display_progress_bar(data['memory_utilization'])}")
+    print("-" * 160)
+
+def display_percentiles():
+    print(f"\n{'Node Group':<30} | " + " | ".join(f"{metric + ' p50/p95/p99':<28}" for metric in usage_stats.METRICS))
+    for group in stats.groups():
+        columns = []
+        for metric in usage_stats.METRICS:
+            values = stats.percentiles(metric, group=group)
+            columns.append("/".join("-" if value is None else f"{value:.1f}" for value in values))
+        print(f"{group:<30} | " + " | ".join(f"{column:<28}" for column in columns))
+
+def allocate_costs(pods, node_prices):
+    """Розподіляє $/год нод між подами та накопичує вартість у cost_ledger."""
+    global cost_rollups
+    pod_usage = fast_decoder.list_pod_metrics(metrics_api)
+    table = pod_table.build(pods, pod_usage)
+    pod_costs, unallocated = cost_allocation.allocate(table, node_prices, cpu_weight)
+    cost_rollups = cost_allocation.rollup(table, pod_costs)
+    cost_ledger.add(cost_rollups, unallocated)
+
+def display_costs(dimension='namespace', top=10):
+    accumulated = cost_ledger.totals.get(dimension, {})
+    print(f"\n{'Cost by ' + dimension:<50} | {'USD/hour':>10} | {'USD total':>12}")
+    rows = sorted(cost_rollups.get(dimension, {}).items(), key=lambda item: item[1], reverse=True)
+    for key, cost in rows[:top]:
+        print(f"{key[:50]:<50} | {cost:>10.4f} | {accumulated.get(key, 0.0):>12.4f}")
+
+def save_state():
+    stats.save(stats_path)
+    cost_ledger.save(cost_path)
+    os.makedirs(export_dir, exist_ok=True)
+    usage_stats.export_csv(stats, os.path.join(export_dir, 'usage_percentiles.csv'))
+    cost_allocation.export_csv(cost_ledger, cost_rollups, os.path.join(export_dir, 'cost_allocation.csv'))
+    node_groups.export_csv(groups, os.path.join(export_dir, 'node_groups.csv'))
+
+def handle_sigterm(signum, frame):
+    # docker stop / systemd / kill: завершуємось так само, як після Ctrl+C, щоб зберегти стан
+    raise KeyboardInterrupt
+
 def analyze_nodes():
+    tick = 0
+    saved_window = usage_stats.window_of(time.time())
     while True:
-        nodes = get_nodes()  # Оновлюємо список нодів на кожному циклі
-        total_cpu_utilization = 0
-        total_memory_utilization = 0
-        total_cpu_capacity = 0
-        total_memory_capacity = 0
-        total_cost = 0.0
-        node_count = 0
         node_data = []
+        node_metrics = fast_decoder.list_node_metrics(metrics_api)  # Реальне споживання з metrics-server
+        rows, pods = get_node_rows()  # Оновлюємо список нодів на кожному циклі
 
-        for node in nodes:
-            instance_id = get_instance_id(node)
+        for node_name, labels, instance_id, utilization in rows:
             if instance_id:
                 instance_type, price, instance_status = get_instance_details(instance_id)
-                cpu_utilization, memory_utilization, cpu_capacity, memory_capacity = get_node_utilization(node)
+                cpu_utilization, memory_utilization, cpu_capacity, memory_capacity = utilization
 
-                node_data.append({
-                    "name": node.metadata.name,
+                real_cpu_usage, real_memory_usage = node_metrics.get(node_name, (None, None))
+                data = {
+                    "name": node_name,
+                    "labels": labels,
                     "instance_type": instance_type,
                     "instance_status": instance_status,  # Додаємо статус інстансу (Spot/On-Demand)
                     "price": price,
                     "cpu_capacity": cpu_capacity,
                     "memory_capacity": memory_capacity,
                     "cpu_utilization": cpu_utilization,
-                    "memory_utilization": memory_utilization
-                })
+                    "memory_utilization": memory_utilization,
+                    "cpu_used": real_cpu_usage,
+                    "memory_used": real_memory_usage
+                }
+                node_data.append(data)
 
-                total_cpu_utilization += cpu_utilization
-                total_memory_utilization += memory_utilization
-                total_cpu_capacity += cpu_capacity
-                total_memory_capacity += memory_capacity
-                total_cost += price
-                node_count += 1
+                stats.record(node_name, node_groups.group_key('nodegroup', data), {
+                    "cpu_usage": (real_cpu_usage / cpu_capacity) * 100 if real_cpu_usage is not None and cpu_capacity > 0 else None,
+                    "memory_usage": (real_memory_usage / memory_capacity) * 100 if real_memory_usage is not None and memory_capacity > 0 else None,
+                    "cpu_requests": cpu_utilization,
+                    "memory_requests": memory_utilization
+                })
             else:
-                print(f"Error: Could not retrieve instance ID for node {node.metadata.name}")
+                print(f"Error: Could not retrieve instance ID for node {node_name}")
+
+        if live_dashboard:
+            live_dashboard.publish(node_data)  # Один збір і одна закодована дельта на тік для всіх глядачів
 
-        if node_count > 0:
-            avg_cpu_utilization = total_cpu_utilization / node_count
-            avg_memory_utilization = total_memory_utilization / node_count
+        # Оновлюємо завжди, щоб зниклі ноди не лишали застарілих підсумків у групах і вартості
+        groups.update(node_data)
+        if pods is not None:
+            allocate_costs(pods, {data["name"]: data["price"] for data in node_data})
 
+        summary = node_table.summary_lines(node_data)
+        if node_data:
             print("\n" + "-" * 160)
             print(
                 f"{'Node Name':<30} | {'Instance Type':<20} | {'Instance Status':<15} | {'Node Pricing':<15} | {'CPU Capacity':<15} | {'Memory Capacity':<15} | {'CPU Utilization':<20} | {'Memory Utilization':<20}")
             print("-" * 160)
             for data in node_data:
+                name, instance_type, instance_status, pricing, cpu_capacity, memory_capacity = node_table.format_node_row(data)[:6]
                 cpu_bar = display_progress_bar(data["cpu_utilization"])
                 memory_bar = display_progress_bar(data["memory_utilization"])
 
                 print(
-                    f"{data['name']:<30} | {data['instance_type']:<20} | {data['instance_status']:<15} | ${data['price']:.4f}/hour     | {data['cpu_capacity']:<15} | {data['memory_capacity']:<15} | {cpu_bar} | {memory_bar}")
+                    f"{name:<30} | {instance_type:<20} | {instance_status:<15} | {pricing}     | {cpu_capacity:<15} | {memory_capacity:<15} | {cpu_bar} | {memory_bar}")
 
             print("-" * 160)
-            print(f"\nAverage CPU Utilization for all nodes: {avg_cpu_utilization:.2f}%")
-            print(f"Average Memory Utilization for all nodes: {avg_memory_utilization:.2f}%")
-            print(f"Total Nodes: {node_count}")
-            print(f"Total CPU Capacity: {total_cpu_capacity:.2f} vCPUs")
-            print(f"Total Memory Capacity: {total_memory_capacity:.2f} GiB")
-            print(f"Total Cost for all nodes: ${total_cost:.4f}/hour")
+            print()
+            for line in summary:
+                print(line)
+            display_grouped(node_data)
+            display_percentiles()
+            if pods is not None:
+                display_costs()
         else:
-            print("\nNo nodes found for utilization analysis.")
+            print("\n" + summary[0])
 
         print("\nPress Ctrl+C to quit...")
+        # Зберігаємо кожні save_every тіків і при зміні добового вікна
+        tick += 1
+        window = usage_stats.window_of(time.time())
+        if (save_every and tick % save_every == 0) or window != saved_window:
+            save_state()
+            saved_window = window
+
         time.sleep(5)
 
+signal.signal(signal.SIGTERM, handle_sigterm)
+
 try:
+    if live_dashboard:
+        dashboard.serve(live_dashboard, int(dashboard_port), dashboard_host)
+        print(f"Dashboard: http://{dashboard_host}:{dashboard_port}/")
     analyze_nodes()
 except KeyboardInterrupt:
     print("\nExiting...")
+finally:
+    save_state()